@@ -1,20 +1,80 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Union
-from datetime import datetime
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
+from pydantic import BaseModel, PrivateAttr
+from typing import List, Union, Tuple, Iterator
+from datetime import datetime, date
 from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 from pathlib import Path
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+import contextvars
 import warnings
 import requests
 import hashlib
+import base64
+import sqlite3
+import threading
+import re
 import json
 import os
+import io
+import time
+import cProfile
+import pstats
+import mimetypes
+import csv
+import random
+import sys
+import argparse
 import uvicorn
 
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:
+    PyinstrumentProfiler = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when installed, otherwise compact stdlib json."""
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
 warnings.filterwarnings("ignore")
-app = FastAPI(title="Camphub Scraper API")
+app = FastAPI(title="Camphub Scraper API", default_response_class=ORJSONResponse)
 
 # Enable CORS
 app.add_middleware(
@@ -25,6 +85,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses; brotli when available (it falls back to gzip for clients without br)
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=1000, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 HEADERS = { ## For unflagging the request
     'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
     'accept-language': 'en-GB,en-US;q=0.9,en;q=0.8,th;q=0.7',
@@ -43,8 +109,16 @@ HEADERS = { ## For unflagging the request
     'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
 }
 
+# One pooled session per process so crawls reuse keep-alive connections to camphub
+# instead of opening a new TLS connection per page.
+HTTP_POOL_SIZE = int(os.environ.get("CAMPHUB_HTTP_POOL_SIZE", "32"))
+http = requests.Session()
+http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE))
+http.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE))
+
 
 SEEN_CONTESTS_FILE = Path("seen_contests.json")
+SEARCH_INDEX_FILE = Path(os.environ.get("CAMPHUB_SEARCH_DB", "contests.db"))
 
 
 # ============================
@@ -58,6 +132,12 @@ class Contest(BaseModel):
     image: str
     status: str
     contest_details: Union[dict, None] = None
+    media: Union[dict, None] = None
+
+    # Revalidation metadata from the crawl; not part of the API payload.
+    _snippet: str = PrivateAttr("")
+    _validators: dict = PrivateAttr(default_factory=dict)
+    _checked_at: float = PrivateAttr(0.0)
     
     
 # ============================
@@ -71,7 +151,7 @@ def send_discord_notification(contest: Contest, discord_webhook: str):
                 "title": contest.title,
                 "description": contest.description[:200] + ("..." if len(contest.description) > 200 else ""),
                 "url": contest.url,
-                "thumbnail": {"url": contest.image},
+                "thumbnail": {"url": thumbnail_url(contest)},
                 "fields": [
                     {"name": "สถานะ", "value": contest.status, "inline": True},
                     {"name": "วันปิดรับสมัคร", "value": contest.contest_details.get("application_deadline", "ไม่ระบุ"), "inline": True},
@@ -88,7 +168,7 @@ def send_discord_notification(contest: Contest, discord_webhook: str):
     }
 
     try:
-        response = requests.post(discord_webhook, json=data)
+        response = http.post(discord_webhook, json=data)
         
         if response.status_code != 204:
             return False
@@ -98,37 +178,817 @@ def send_discord_notification(contest: Contest, discord_webhook: str):
     except Exception as e:
         return False
 
+def _embed_value(value) -> str:
+    if isinstance(value, (list, tuple)):
+        value = ", ".join(str(v) for v in value)
+    return value or "ไม่ระบุ"
+
+def send_discord_update_notification(contest: Contest, diff: dict, discord_webhook: str):
+    data = {
+        "embeds": [
+            {
+                "title": f"[อัปเดต] {contest.title}",
+                "url": contest.url,
+                "thumbnail": {"url": thumbnail_url(contest)},
+                "fields": [
+                    {
+                        "name": CONTEST_FIELD_LABELS.get(field, field),
+                        "value": f"{_embed_value(old)} → {_embed_value(new)}"[:1024],
+                        "inline": False
+                    }
+                    for field, (old, new) in diff.items()
+                ],
+                "footer": {"text": "ส่งจาก Camphub Scraper API"},
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        ]
+    }
+
+    try:
+        response = http.post(discord_webhook, json=data)
+        return response.status_code == 204
+    except Exception as e:
+        return False
+
 # ============================
 # UTILITIES
 # ============================
 
 def hash_contest(contest: Contest) -> str:
-    return hashlib.md5(contest.url.encode("utf-8")).hexdigest()
+    return hash_contest_url(contest.url)
 
-def load_seen_contests() -> set:
-    if SEEN_CONTESTS_FILE.exists():
-        with open(SEEN_CONTESTS_FILE, "r", encoding="utf-8") as f:
-            try:
-                return set(json.load(f))
-            except json.JSONDecodeError:
-                return set()
-    return set()
+def hash_contest_url(url: str) -> str:
+    return hashlib.md5(url.encode("utf-8")).hexdigest()
+
+def load_seen_contests() -> dict:
+    """
+    Seen state keyed by ``hash_contest``. Each entry holds the listing snippet hash,
+    HTTP validators, the last parsed details and their fingerprint.
+    Older files stored a plain list of ids; those load as entries without a fingerprint.
+    """
+    return get_backend().load_seen()
+
+def save_seen_contests(entries: dict):
+    """Merge ``entries`` into the stored seen state (other ids are left as they are)."""
+    get_backend().update_seen(entries)
+
+# Fields that make up a contest's content fingerprint. ``closing_in_days`` is left out
+# because it counts down every day without the camp itself changing.
+FINGERPRINT_FIELDS = (
+    "title", "categories", "event_format", "event_date", "application_deadline",
+    "max_participants", "fee", "qualifications", "organizer", "poster_image",
+)
+
+CONTEST_FIELD_LABELS = {
+    "title": "ชื่อค่าย",
+    "categories": "หมวดหมู่",
+    "event_format": "รูปแบบกิจกรรม",
+    "event_date": "วันที่จัดกิจกรรม",
+    "application_deadline": "วันปิดรับสมัคร",
+    "max_participants": "จำนวนที่รับ",
+    "fee": "ค่าใช้จ่าย",
+    "qualifications": "คุณสมบัติ",
+    "organizer": "ผู้จัดงาน",
+    "poster_image": "โปสเตอร์",
+    "status": "สถานะ",
+}
+
+def _normalize_field(value):
+    if isinstance(value, list):
+        return [_normalize_field(v) for v in value]
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+def normalize_contest_details(details: Union[dict, None]) -> dict:
+    details = details or {}
+    return {k: _normalize_field(details.get(k, "")) for k in FINGERPRINT_FIELDS}
+
+CLOSED_STATUS = "ปิดรับสมัครแล้ว"
+
+def open_state(status: str) -> str:
+    """
+    Reduce the listing status to open/closed. Open camps show a countdown such as
+    ``เหลือ 3 วัน`` that changes daily, like ``closing_in_days``.
+    """
+    return CLOSED_STATUS if _normalize_field(status) == CLOSED_STATUS else "เปิดรับสมัคร"
+
+def fingerprint_contest(contest: Contest) -> str:
+    payload = normalize_contest_details(contest.contest_details)
+    payload["status"] = open_state(contest.status)
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+def hash_snippet(title: str, description: str, image: str, status: str) -> str:
+    return hashlib.md5("\x1f".join((title, description, image, open_state(status))).encode("utf-8")).hexdigest()
+
+def diff_contest(old: dict, contest: Contest) -> dict:
+    """Field-level diff between a stored seen entry and a freshly scraped contest."""
+    before = normalize_contest_details(old.get("details"))
+    before["status"] = open_state(old.get("status", ""))
+    after = normalize_contest_details(contest.contest_details)
+    after["status"] = open_state(contest.status)
+    return {k: (before.get(k, ""), after[k]) for k in after if before.get(k, "") != after[k]}
 
-def save_seen_contests(seen: set):
-    with open(SEEN_CONTESTS_FILE, "w", encoding="utf-8") as f:
-        json.dump(list(seen), f, ensure_ascii=False, indent=2)
+def make_seen_entry(contest: Contest) -> dict:
+    return {
+        "url": contest.url,
+        "snippet": contest._snippet,
+        "validators": contest._validators,
+        "checked_at": contest._checked_at,
+        "status": open_state(contest.status),
+        "details": contest.contest_details,
+        "fingerprint": fingerprint_contest(contest),
+    }
 
 def is_valid_camphub_url(url: str) -> bool:
     return urlparse(url).netloc.endswith("camphub.in.th")
 
+THAI_MONTHS = {
+    "มกราคม": 1, "ม.ค.": 1, "กุมภาพันธ์": 2, "ก.พ.": 2, "มีนาคม": 3, "มี.ค.": 3,
+    "เมษายน": 4, "เม.ย.": 4, "พฤษภาคม": 5, "พ.ค.": 5, "มิถุนายน": 6, "มิ.ย.": 6,
+    "กรกฎาคม": 7, "ก.ค.": 7, "สิงหาคม": 8, "ส.ค.": 8, "กันยายน": 9, "ก.ย.": 9,
+    "ตุลาคม": 10, "ต.ค.": 10, "พฤศจิกายน": 11, "พ.ย.": 11, "ธันวาคม": 12, "ธ.ค.": 12,
+}
+_THAI_DATE_RE = re.compile(
+    r"(\d{1,2})\s*(" + "|".join(re.escape(m) for m in sorted(THAI_MONTHS, key=len, reverse=True)) + r")\s*(\d{2,4})"
+)
+_NUMBER_RE = re.compile(r"\d[\d,]*")
+_BAHT_RE = re.compile(r"(\d[\d,]*)\s*บาท")
+
+def parse_thai_date(text: str) -> Union[date, None]:
+    """Parse dates like ``30 ตุลาคม 2569`` or ``30 ต.ค. 69`` (Buddhist era) into a ``date``."""
+    m = _THAI_DATE_RE.search(text or "")
+    if not m:
+        return None
+    day, month, year = int(m.group(1)), THAI_MONTHS[m.group(2)], int(m.group(3))
+    if year < 100:
+        year += 2500
+    if year > 2400:
+        year -= 543
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+def parse_fee(text: str) -> Union[int, None]:
+    """
+    Fee in baht; 0 for free camps, None when the page doesn't say. An amount in บาท wins
+    over the word ฟรี (``500 บาท (ฟรีอาหาร)``), and ฟรี wins over unrelated numbers
+    (``ฟรี ตลอด 3 วัน 2 คืน``); a bare number is the last resort.
+    """
+    text = text or ""
+    m = _BAHT_RE.search(text)
+    if m:
+        return int(m.group(1).replace(",", ""))
+    if "ฟรี" in text or "ไม่มีค่าใช้จ่าย" in text:
+        return 0
+    m = _NUMBER_RE.search(text)
+    return int(m.group(0).replace(",", "")) if m else None
+
+CONTEST_FIELDS = ("title", "description", "url", "image", "status", "contest_details", "media")
+
+def parse_fields(fields: Union[str, None]) -> Union[List[str], None]:
+    """
+    Parse a ``fields=`` projection such as ``title,url,contest_details.application_deadline``.
+    Raises ValueError on unknown top-level fields.
+    """
+    if not fields:
+        return None
+    parsed = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in parsed if f.split(".", 1)[0] not in CONTEST_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return parsed
+
+def wants_details(fields: Union[List[str], None]) -> bool:
+    return fields is None or any(f.split(".", 1)[0] == "contest_details" for f in fields)
+
+def project_contest(contest: Contest, fields: Union[List[str], None] = None) -> dict:
+    if fields is None:
+        return {f: getattr(contest, f) for f in CONTEST_FIELDS}
+    out = {}
+    for f in fields:
+        if f.startswith("contest_details."):
+            key = f.split(".", 1)[1]
+            out.setdefault("contest_details", {})[key] = (contest.contest_details or {}).get(key)
+        else:
+            out[f] = getattr(contest, f)
+    return out
+
+def encode_cursor(scope: str, page: int, offset: int) -> str:
+    raw = json.dumps({"s": scope, "p": page, "o": offset}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, scope: str) -> Tuple[int, int]:
+    """Decode an opaque cursor into ``(page, offset)``; it must belong to the same listing."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        page, offset = int(data["p"]), int(data["o"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if data.get("s") != scope or page < 1 or offset < 0:
+        raise ValueError("Cursor does not match this listing")
+    return page, offset
+
+
+# ============================
+# TRACING
+# ============================
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+# Set while a profiler is attached to the request thread; crawls then stay on that
+# thread so the profile covers detail fetching and parsing too.
+_profiling = contextvars.ContextVar("profiling", default=False)
+
+
+class _NullSpan(dict):
+    """Span stand-in used when tracing is off; attribute writes are dropped."""
+    def __setitem__(self, key, value):
+        pass
+
+    def update(self, *args, **kwargs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """Per-request span tree. Each span records its wall time and free-form attrs."""
+
+    def __init__(self, name: str):
+        self._t0 = time.perf_counter()
+        self.root = {"name": name, "start_ms": 0.0, "duration_ms": None, "attrs": {}, "children": []}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _now_ms(self) -> float:
+        return round((time.perf_counter() - self._t0) * 1000, 3)
+
+    def _stack(self) -> list:
+        # Each thread keeps its own open-span stack so worker threads can nest safely.
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = [self.root]
+        return stack
+
+    def current(self) -> dict:
+        return self._stack()[-1]
+
+    @contextmanager
+    def attach(self, parent: dict):
+        """Nest spans opened by the current thread under ``parent``."""
+        previous = getattr(self._local, "stack", None)
+        self._local.stack = [parent]
+        try:
+            yield
+        finally:
+            self._local.stack = previous
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        node = {"name": name, "start_ms": self._now_ms(), "duration_ms": None, "attrs": attrs, "children": []}
+        stack = self._stack()
+        with self._lock:
+            stack[-1]["children"].append(node)
+        stack.append(node)
+        try:
+            yield node["attrs"]
+        finally:
+            node["duration_ms"] = round(self._now_ms() - node["start_ms"], 3)
+            stack.pop()
+
+    def finish(self) -> dict:
+        self.root["duration_ms"] = self._now_ms()
+        return self.root
+
+
+@contextmanager
+def _null_span():
+    yield _NULL_SPAN
+
+
+def trace_span(name: str, **attrs):
+    """Open a child span on the active trace, or a no-op when tracing is disabled."""
+    trace = _current_trace.get()
+    if trace is None:
+        return _null_span()
+    return trace.span(name, **attrs)
+
+
+def submit_traced(executor: ThreadPoolExecutor, fn: callable, *args):
+    """``executor.submit`` that keeps the worker's spans under the caller's current span."""
+    trace = _current_trace.get()
+    if trace is None:
+        return executor.submit(fn, *args)
+    parent = trace.current()
+
+    def run():
+        token = _current_trace.set(trace)
+        try:
+            with trace.attach(parent):
+                return fn(*args)
+        finally:
+            _current_trace.reset(token)
+
+    return executor.submit(run)
+
+
+def _summarize_trace(node: dict, depth: int = 0) -> List[str]:
+    attrs = " ".join(f"{k}={v}" for k, v in node["attrs"].items())
+    lines = [f"{'  ' * depth}{node['name']} {node['duration_ms']}ms {attrs}".rstrip()]
+    for child in node["children"]:
+        lines.extend(_summarize_trace(child, depth + 1))
+    return lines
+
+
+@contextmanager
+def request_trace(name: str, enabled: bool = False, profile: Union[str, None] = None):
+    """
+    Activate tracing (and optionally profiling) for the enclosed block.
+    Yields a dict that is filled with ``trace`` / ``profile`` entries on exit,
+    or stays empty when both are off. Profilers only see the calling thread, so
+    while one is attached detail pages are fetched inline instead of on the pool.
+    """
+    report = {}
+    if not enabled and not profile:
+        yield report
+        return
+
+    trace = Trace(name) if enabled else None
+    token = _current_trace.set(trace)
+
+    profiler = None
+    if profile == "pyinstrument" and PyinstrumentProfiler is not None:
+        profiler = PyinstrumentProfiler()
+    elif profile:
+        profiler = cProfile.Profile()
+    profiling_token = _profiling.set(profiler is not None)
+    if profiler is not None:
+        profiler.enable() if isinstance(profiler, cProfile.Profile) else profiler.start()
+
+    try:
+        yield report
+    finally:
+        _current_trace.reset(token)
+        _profiling.reset(profiling_token)
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+            report["profile"] = out.getvalue()
+        elif profiler is not None:
+            profiler.stop()
+            report["profile"] = profiler.output_text(unicode=True)
+        if trace is not None:
+            report["trace"] = trace.finish()
+            print("[Trace]\n" + "\n".join(_summarize_trace(report["trace"])))
+
+
+# ============================
+# SOURCES
+# ============================
+
+BASE_URL = "https://www.camphub.in.th/"
+
+
+class ListingSource:
+    """
+    A camphub listing and how to crawl it: URL template, pagination rule,
+    stop rule, and crawl settings (detail fetch concurrency, page cache TTL in seconds).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        paginate: str = "page/{page}/",
+        stop_on_closed: bool = True,
+        max_pages: Union[int, None] = None,
+        concurrency: int = 4,
+        cache_ttl: int = 120,
+    ):
+        self.name = name
+        self.path = path
+        self.paginate = paginate
+        self.stop_on_closed = stop_on_closed
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.cache_ttl = cache_ttl
+        # Bind the templates once; building a page URL is then a single format call.
+        self._first_page = (BASE_URL + path).format
+        self._next_page = (BASE_URL + path + paginate).format
+
+    def page_url(self, category: str, page: int) -> str:
+        if page > 1:
+            return self._next_page(category=category, page=page)
+        return self._first_page(category=category)
+
+
+SOURCES = {
+    source.name: source
+    for source in (
+        ListingSource("default", "{category}/"),
+        ListingSource("type", "type/{category}/"),
+        ListingSource("tag", "tag/{category}/"),
+        ListingSource("medical", "medical-health/{category}/"),
+        ListingSource("private", "private-university/"),
+    )
+}
+
+def get_source(type: str) -> ListingSource:
+    # Unknown types have always meant the plain /{category}/ listing.
+    return SOURCES.get(type, SOURCES["default"])
+
+
+# ============================
+# SHARED STATE
+# ============================
+# The page cache, seen contests, crawl leases and scheduler run history live behind a backend so several
+# uvicorn workers or containers can share them. Pick one with CAMPHUB_BACKEND_URL:
+#   unset               in-process cache + seen_contests.json (single worker)
+#   sqlite:///state.db  one SQLite file shared by workers on the same host/volume
+#   redis://host:6379/0 Redis, for workers spread across containers
+
+PAGE_CACHE_MAX_ENTRIES = int(os.environ.get("CAMPHUB_PAGE_CACHE_SIZE", "2048"))
+
+
+class Page:
+    """Snapshot of an HTTP response, small enough to keep in the page cache."""
+    __slots__ = ("status_code", "text", "size", "headers", "from_cache")
+
+    def __init__(self, status_code: int, text: str, size: int, headers: dict, from_cache: bool = False):
+        self.status_code = status_code
+        self.text = text
+        self.size = size
+        self.headers = headers
+        self.from_cache = from_cache
+
+    def dumps(self) -> str:
+        return json.dumps({"s": self.status_code, "t": self.text, "z": self.size, "h": self.headers}, ensure_ascii=False)
+
+    @classmethod
+    def loads(cls, raw: Union[str, bytes]) -> "Page":
+        data = json.loads(raw)
+        return cls(data["s"], data["t"], data["z"], data["h"], from_cache=True)
+
+
+class LocalBackend:
+    """Single-process state: an LRU page cache in memory and the seen set in SEEN_CONTESTS_FILE."""
+
+    def __init__(self):
+        self._pages = OrderedDict()
+        self._leases = {}
+        self._runs = deque()
+        self._lock = threading.Lock()
+
+    def get_page(self, url: str) -> Union[Page, None]:
+        with self._lock:
+            cached = self._pages.get(url)
+            if cached is None or cached[0] <= time.time():
+                return None
+            self._pages.move_to_end(url)
+            page = cached[1]
+        return Page(page.status_code, page.text, page.size, page.headers, from_cache=True)
+
+    def set_page(self, url: str, page: Page, ttl: int):
+        with self._lock:
+            self._pages[url] = (time.time() + ttl, page)
+            self._pages.move_to_end(url)
+            while len(self._pages) > PAGE_CACHE_MAX_ENTRIES:
+                self._pages.popitem(last=False)
+
+    def _read_seen_file(self) -> dict:
+        if SEEN_CONTESTS_FILE.exists():
+            with open(SEEN_CONTESTS_FILE, "r", encoding="utf-8") as f:
+                try:
+                    data = json.load(f)
+                except json.JSONDecodeError:
+                    return {}
+            if isinstance(data, list):
+                return {cid: {} for cid in data}
+            return data
+        return {}
+
+    def load_seen(self) -> dict:
+        with self._lock:
+            return self._read_seen_file()
+
+    def update_seen(self, entries: dict):
+        with self._lock:
+            seen = self._read_seen_file()
+            seen.update(entries)
+            with open(SEEN_CONTESTS_FILE, "w", encoding="utf-8") as f:
+                json.dump(seen, f, ensure_ascii=False, indent=2)
+
+    def acquire_lease(self, name: str, ttl: int) -> Union[str, None]:
+        token = os.urandom(8).hex()
+        with self._lock:
+            held = self._leases.get(name)
+            if held is not None and held[1] > time.time():
+                return None
+            self._leases[name] = (token, time.time() + ttl)
+        return token
+
+    def renew_lease(self, name: str, token: str, ttl: int) -> bool:
+        with self._lock:
+            held = self._leases.get(name)
+            if held is None or held[0] != token or held[1] <= time.time():
+                return False
+            self._leases[name] = (token, time.time() + ttl)
+        return True
+
+    def release_lease(self, name: str, token: str):
+        with self._lock:
+            if self._leases.get(name, (None,))[0] == token:
+                del self._leases[name]
+
+    def append_run(self, run: dict, keep: int):
+        with self._lock:
+            self._runs.appendleft(run)
+            while len(self._runs) > keep:
+                self._runs.pop()
+
+    def recent_runs(self, limit: int) -> List[dict]:
+        with self._lock:
+            return list(self._runs)[:limit]
+
+
+class SQLiteBackend:
+    """State in one SQLite file; WAL mode lets every worker on the host read while one writes."""
+
+    def __init__(self, path: str):
+        # Autocommit mode; transactions that need atomicity open BEGIN IMMEDIATE themselves.
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, expires REAL NOT NULL, body TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS seen (id TEXT PRIMARY KEY, entry TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, token TEXT NOT NULL, expires REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY AUTOINCREMENT, run TEXT NOT NULL);
+        """)
+        self._import_seen_file()
+
+    def _import_seen_file(self):
+        # Carry over seen_contests.json from single-worker runs, so switching backends
+        # doesn't re-announce every tracked contest.
+        if not SEEN_CONTESTS_FILE.exists():
+            return
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if self._db.execute("SELECT 1 FROM seen LIMIT 1").fetchone() is None:
+                    self._db.executemany(
+                        "INSERT INTO seen (id, entry) VALUES (?, ?)",
+                        [(cid, json.dumps(e, ensure_ascii=False)) for cid, e in LocalBackend()._read_seen_file().items()],
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def get_page(self, url: str) -> Union[Page, None]:
+        with self._lock:
+            row = self._db.execute("SELECT body FROM pages WHERE url = ? AND expires > ?", (url, time.time())).fetchone()
+        return Page.loads(row[0]) if row else None
+
+    def set_page(self, url: str, page: Page, ttl: int):
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO pages (url, expires, body) VALUES (?, ?, ?)", (url, now + ttl, page.dumps()))
+            self._db.execute("DELETE FROM pages WHERE expires <= ?", (now,))
+
+    def load_seen(self) -> dict:
+        with self._lock:
+            return {cid: json.loads(entry) for cid, entry in self._db.execute("SELECT id, entry FROM seen")}
+
+    def update_seen(self, entries: dict):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO seen (id, entry) VALUES (?, ?)",
+                    [(cid, json.dumps(e, ensure_ascii=False)) for cid, e in entries.items()],
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def acquire_lease(self, name: str, ttl: int) -> Union[str, None]:
+        token = os.urandom(8).hex()
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT expires FROM leases WHERE name = ?", (name,)).fetchone()
+                if row is not None and row[0] > now:
+                    self._db.execute("ROLLBACK")
+                    return None
+                self._db.execute("INSERT OR REPLACE INTO leases (name, token, expires) VALUES (?, ?, ?)", (name, token, now + ttl))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return token
+
+    def renew_lease(self, name: str, token: str, ttl: int) -> bool:
+        now = time.time()
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE leases SET expires = ? WHERE name = ? AND token = ? AND expires > ?",
+                (now + ttl, name, token, now),
+            )
+        return cur.rowcount == 1
+
+    def release_lease(self, name: str, token: str):
+        with self._lock:
+            self._db.execute("DELETE FROM leases WHERE name = ? AND token = ?", (name, token))
+
+    def append_run(self, run: dict, keep: int):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                cur = self._db.execute("INSERT INTO runs (run) VALUES (?)", (json.dumps(run, ensure_ascii=False),))
+                self._db.execute("DELETE FROM runs WHERE id <= ?", (cur.lastrowid - keep,))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def recent_runs(self, limit: int) -> List[dict]:
+        with self._lock:
+            rows = self._db.execute("SELECT run FROM runs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+
+class RedisBackend:
+    """
+    State in Redis: pages as expiring strings, seen entries in one hash, leases via
+    SET NX PX and run history in a capped list.
+    """
+
+    _RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+    _RENEW = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+
+    def __init__(self, url: str, prefix: str = "camphub:"):
+        if redis is None:
+            raise RuntimeError("CAMPHUB_BACKEND_URL points at Redis but the redis package is not installed")
+        self._r = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._release = self._r.register_script(self._RELEASE)
+        self._renew = self._r.register_script(self._RENEW)
+
+    def get_page(self, url: str) -> Union[Page, None]:
+        raw = self._r.get(self._prefix + "page:" + url)
+        return Page.loads(raw) if raw else None
+
+    def set_page(self, url: str, page: Page, ttl: int):
+        self._r.set(self._prefix + "page:" + url, page.dumps(), ex=ttl)
+
+    def load_seen(self) -> dict:
+        return {cid.decode(): json.loads(entry) for cid, entry in self._r.hgetall(self._prefix + "seen").items()}
+
+    def update_seen(self, entries: dict):
+        if entries:
+            self._r.hset(self._prefix + "seen", mapping={cid: json.dumps(e, ensure_ascii=False) for cid, e in entries.items()})
+
+    def acquire_lease(self, name: str, ttl: int) -> Union[str, None]:
+        token = os.urandom(8).hex()
+        if self._r.set(self._prefix + "lease:" + name, token, nx=True, px=int(ttl * 1000)):
+            return token
+        return None
+
+    def renew_lease(self, name: str, token: str, ttl: int) -> bool:
+        return bool(self._renew(keys=[self._prefix + "lease:" + name], args=[token, int(ttl * 1000)]))
+
+    def release_lease(self, name: str, token: str):
+        self._release(keys=[self._prefix + "lease:" + name], args=[token])
+
+    def append_run(self, run: dict, keep: int):
+        pipe = self._r.pipeline()
+        pipe.lpush(self._prefix + "runs", json.dumps(run, ensure_ascii=False))
+        pipe.ltrim(self._prefix + "runs", 0, keep - 1)
+        pipe.execute()
+
+    def recent_runs(self, limit: int) -> List[dict]:
+        return [json.loads(raw) for raw in self._r.lrange(self._prefix + "runs", 0, limit - 1)]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                url = os.environ.get("CAMPHUB_BACKEND_URL", "")
+                if url.startswith("redis://") or url.startswith("rediss://"):
+                    _backend = RedisBackend(url)
+                elif url.startswith("sqlite:///"):
+                    _backend = SQLiteBackend(url[len("sqlite:///"):])
+                else:
+                    _backend = LocalBackend()
+    return _backend
+
+
+CRAWL_LEASE_TTL = int(os.environ.get("CAMPHUB_CRAWL_LEASE_TTL", "600"))
+CRAWL_LEASE_WAIT = float(os.environ.get("CAMPHUB_CRAWL_LEASE_WAIT", "60"))
+
+@contextmanager
+def crawl_lease(name: str, wait: float = 0, ttl: int = CRAWL_LEASE_TTL):
+    """
+    Hold the named lease for the enclosed block; yields False if it could not be taken
+    within ``wait`` seconds. Waiting callers usually find the holder's pages in the
+    shared cache once it is released.
+    """
+    backend = get_backend()
+    deadline = time.monotonic() + wait
+    delay = 0.05
+    token = backend.acquire_lease(name, ttl)
+    while token is None and time.monotonic() < deadline:
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)
+        token = backend.acquire_lease(name, ttl)
+    try:
+        yield token is not None
+    finally:
+        if token is not None:
+            backend.release_lease(name, token)
+
 
 # ============================
 # SCRAPER
 # ============================
+# Details reused on an unchanged listing snippet are refetched once they are older than this
+DETAILS_MAX_AGE = int(os.environ.get("CAMPHUB_DETAILS_MAX_AGE", "21600"))
+
+def fetch_page(url: str, ttl: int = 0, headers: Union[dict, None] = None) -> Page:
+    """GET ``url``, serving it from the page cache when a copy younger than ``ttl`` seconds exists."""
+    if ttl > 0:
+        cached = get_backend().get_page(url)
+        if cached is not None:
+            return cached
+
+    res = http.get(url, headers=headers or HEADERS)
+    page = Page(res.status_code, res.text, len(res.content), {k.lower(): v for k, v in res.headers.items()})
+    if ttl > 0 and res.status_code == 200:
+        get_backend().set_page(url, page, ttl)
+    return page
+
+
+def _cache_status(page: Page, ttl: int) -> str:
+    if ttl <= 0:
+        return "none"
+    return "hit" if page.from_cache else "miss"
+
 
 def fetch_contest_details(url: str) -> dict:
-    res = requests.get(url, headers=HEADERS)
-    soup = BeautifulSoup(res.text, "html.parser")
+    details, _ = fetch_contest_details_conditional(url)
+    return details
+
+def fetch_contest_details_conditional(
+    url: str,
+    validators: Union[dict, None] = None,
+    ttl: int = 0,
+) -> Tuple[Union[dict, None], dict]:
+    """
+    Fetch a detail page, sending If-None-Match / If-Modified-Since from ``validators``.
+    Returns ``(None, validators)`` when the server answers 304, otherwise the parsed
+    details together with the response's fresh validators.
+    """
+    validators = validators or {}
+    headers = HEADERS
+    if validators:
+        headers = dict(HEADERS)
+        if validators.get("etag"):
+            headers["if-none-match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["if-modified-since"] = validators["last_modified"]
+
+    with trace_span("detail", url=url) as sp:
+        with trace_span("fetch"):
+            res = fetch_page(url, ttl=ttl, headers=headers)
+        sp["status"] = res.status_code
+        sp["bytes"] = res.size
+        if res.status_code == 304:
+            sp["cache"] = "revalidated"
+            return None, validators
+        sp["cache"] = _cache_status(res, ttl)
+
+        fresh = {}
+        if res.headers.get("etag"):
+            fresh["etag"] = res.headers["etag"]
+        if res.headers.get("last-modified"):
+            fresh["last_modified"] = res.headers["last-modified"]
+
+        with trace_span("parse"):
+            return _parse_contest_details(res.text), fresh
+
+def _parse_contest_details(html: str) -> dict:
+    soup = BeautifulSoup(html, "html.parser")
 
     def sel_text(sel): el = soup.select_one(sel); return el.text.strip() if el else ""
     def sel_attr(sel, attr): el = soup.select_one(sel); return el[attr] if el and el.has_attr(attr) else ""
@@ -147,44 +1007,876 @@ def fetch_contest_details(url: str) -> dict:
         "poster_image": sel_attr("img[data-src]", "data-src")
     }
 
-def scrape_contests(url_generator: callable, stop_on_closed=True) -> List[Contest]:
-    contests = []
-    page = 1
+def scrape_contests(
+    source: ListingSource,
+    category: str,
+    seen: Union[dict, None] = None,
+    with_details: bool = True,
+) -> List[Contest]:
+    """
+    Crawl a listing source until its stop rule fires (empty page, or the first closed camp).
+    When ``seen`` state is given, stored details are revalidated with their ETag /
+    Last-Modified and reused on 304; entries without validators are reused as long
+    as their listing snippet is unchanged. Full downloads and parses then scale with
+    what actually changed.
+    ``with_details=False`` skips detail pages entirely (``contest_details`` stays None).
+    """
+    return [c for c, _, _ in iter_contests(source, category, seen=seen, with_details=with_details)]
+
+def _parse_listing_article(article) -> dict:
+    title_tag = article.find("h2", class_="entry-title").find("a")
+    desc = article.find("div", class_="entry-content").text.strip().replace("\n", " ")
+    img = article.find("img")
+    status = article.find("span", class_="closedate")
+    return {
+        "title": title_tag.text.strip(),
+        "url": title_tag["href"],
+        "description": desc,
+        "image": img["data-src"] if img and img.has_attr("data-src") else "",
+        "status": status.text.strip() if status else "เปิดรับสมัคร",
+    }
+
+def iter_contests(
+    source: ListingSource,
+    category: str,
+    seen: Union[dict, None] = None,
+    with_details: bool = True,
+    start_page: int = 1,
+    start_offset: int = 0,
+    limit: Union[int, None] = None,
+):
+    """
+    Lazily crawl contests, yielding ``(contest, page, offset)`` where ``offset`` is the
+    article's position on its listing page. Listing pages are only fetched as the
+    consumer pulls; detail pages for one listing page are fetched ``source.concurrency``
+    at a time, and never past ``limit``.
+    """
+    executor = None
+    if with_details and source.concurrency > 1 and not _profiling.get():
+        executor = ThreadPoolExecutor(max_workers=source.concurrency, thread_name_prefix=f"crawl-{source.name}")
+
+    def resolve(row):
+        entry = row["entry"]
+        if not with_details:
+            return None, {}, 0.0
+        # Without validators there is no cheap way to ask the detail page if it changed,
+        # so an unchanged listing snippet is taken as unchanged details until they reach
+        # DETAILS_MAX_AGE; the refetch also picks up validators the server started sending.
+        checked_at = entry.get("checked_at") or 0.0
+        if (
+            entry.get("details") is not None
+            and entry.get("snippet") == row["snippet"]
+            and not entry.get("validators")
+            and time.time() - checked_at < DETAILS_MAX_AGE
+        ):
+            with trace_span("detail", url=row["url"], cache="snippet"):
+                return entry["details"], {}, checked_at
+        details, validators = fetch_contest_details_conditional(
+            row["url"],
+            entry.get("validators") if entry.get("details") is not None else None,
+            ttl=source.cache_ttl,
+        )
+        return (entry["details"] if details is None else details), validators, time.time()
+
+    yielded = 0
+    page = start_page
+    try:
+        while source.max_pages is None or page <= source.max_pages:
+            url = source.page_url(category, page)
+            print(f"[Scraping] {url}")
+            with trace_span("listing_page", page=page, url=url) as sp:
+                with trace_span("fetch"):
+                    r = fetch_page(url, ttl=source.cache_ttl)
+                sp["status"] = r.status_code
+                sp["bytes"] = r.size
+                sp["cache"] = _cache_status(r, source.cache_ttl)
+                if r.status_code != 200:
+                    return
+
+                with trace_span("parse"):
+                    soup = BeautifulSoup(r.text, "html.parser")
+                    articles = soup.find_all("article", class_="vce-post")
+                sp["articles"] = len(articles)
+                if not articles:
+                    return
+
+                rows = []
+                stopped = False
+                for offset, a in enumerate(articles):
+                    if page == start_page and offset < start_offset:
+                        continue
+                    row = _parse_listing_article(a)
+                    if source.stop_on_closed and row["status"] == CLOSED_STATUS:
+                        stopped = True
+                        break
+                    row["offset"] = offset
+                    row["snippet"] = hash_snippet(row["title"], row["description"], row["image"], row["status"])
+                    row["entry"] = (seen or {}).get(hash_contest_url(row["url"])) or {}
+                    rows.append(row)
+                    if limit is not None and yielded + len(rows) >= limit:
+                        stopped = True
+                        break
+
+                if executor is not None:
+                    futures = [submit_traced(executor, resolve, row) for row in rows]
+                    results = (f.result() for f in futures)
+                else:
+                    results = (resolve(row) for row in rows)
+
+                for row, (details, validators, checked_at) in zip(rows, results):
+                    contest = Contest(
+                        title=row["title"],
+                        description=row["description"],
+                        url=row["url"],
+                        image=row["image"],
+                        status=row["status"],
+                        contest_details=details
+                    )
+                    contest._snippet = row["snippet"]
+                    contest._validators = validators
+                    contest._checked_at = checked_at
+                    yield contest, page, row["offset"]
+                    yielded += 1
+
+                if stopped:
+                    return
+
+            page += 1
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ============================
+# SEARCH INDEX
+# ============================
+
+_search_db = None
+_search_lock = threading.Lock()
+
+def _get_search_db() -> sqlite3.Connection:
+    global _search_db
+    if _search_db is None:
+        # Every worker writes to the index after its crawls; WAL and a busy timeout keep
+        # them from failing with "database is locked" while another one is writing.
+        db = sqlite3.connect(SEARCH_INDEX_FILE, timeout=30, check_same_thread=False)
+        db.row_factory = sqlite3.Row
+        db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS contests (
+                id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                image TEXT NOT NULL,
+                status TEXT NOT NULL,
+                details TEXT,
+                source TEXT,
+                categories TEXT,
+                fee INTEGER,
+                deadline TEXT,
+                updated_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS contests_deadline ON contests (deadline);
+            CREATE INDEX IF NOT EXISTS contests_fee ON contests (fee);
+            CREATE TABLE IF NOT EXISTS media (
+                url TEXT PRIMARY KEY,
+                hash TEXT NOT NULL
+            );
+            -- trigram tokenization works for Thai, which has no spaces between words
+            CREATE VIRTUAL TABLE IF NOT EXISTS contests_fts USING fts5(
+                title, organizer, qualifications, description, tokenize='trigram'
+            );
+        """)
+        # Earlier versions keyed the FTS rows by an unindexed id column; rebuild those
+        # keyed by contests.rowid, which FTS5 can look up directly.
+        if "id" in [r[1] for r in db.execute("PRAGMA table_info(contests_fts)")]:
+            with db:
+                db.execute("DROP TABLE contests_fts")
+                db.execute("""
+                    CREATE VIRTUAL TABLE contests_fts USING fts5(
+                        title, organizer, qualifications, description, tokenize='trigram'
+                    )
+                """)
+                db.executemany(
+                    "INSERT INTO contests_fts (rowid, title, organizer, qualifications, description) VALUES (?, ?, ?, ?, ?)",
+                    [_fts_row(r["rowid"], r["title"], json.loads(r["details"] or "{}"), r["description"])
+                     for r in db.execute("SELECT rowid, title, details, description FROM contests")],
+                )
+        _search_db = db
+    return _search_db
+
+def _fts_row(rowid: int, title: str, details: dict, description: str) -> tuple:
+    return (rowid, title, details.get("organizer", ""), details.get("qualifications", ""), description)
+
+def index_contests(contests: List[Contest], source: str = ""):
+    """Upsert scraped contests into the local search index."""
+    now = datetime.now().isoformat()
+    rows, fts_fields = [], {}
+    for c in contests:
+        details = c.contest_details or {}
+        cid = hash_contest(c)
+        deadline = parse_thai_date(details.get("application_deadline", ""))
+        rows.append((
+            cid, c.url, c.title, c.description, c.image, c.status,
+            json.dumps(details, ensure_ascii=False), source,
+            "|" + "|".join(details.get("categories") or []) + "|",
+            parse_fee(details.get("fee", "")),
+            deadline.isoformat() if deadline else None,
+            now,
+        ))
+        fts_fields[cid] = (c.title, details, c.description)
+
+    with _search_lock:
+        db = _get_search_db()
+        with db:
+            db.executemany("""
+                INSERT INTO contests (id, url, title, description, image, status, details, source, categories, fee, deadline, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    url=excluded.url, title=excluded.title, description=excluded.description,
+                    image=excluded.image, status=excluded.status, details=excluded.details,
+                    source=excluded.source, categories=excluded.categories, fee=excluded.fee,
+                    deadline=excluded.deadline, updated_at=excluded.updated_at
+            """, rows)
+            # FTS rows share the contests rowid (stable across upserts), so replacing
+            # them is a rowid lookup rather than a scan of the FTS table.
+            rowids = [
+                (r["id"], r["rowid"])
+                for cid in fts_fields
+                for r in db.execute("SELECT id, rowid FROM contests WHERE id = ?", (cid,))
+            ]
+            db.executemany("DELETE FROM contests_fts WHERE rowid = ?", [(rowid,) for _, rowid in rowids])
+            db.executemany(
+                "INSERT INTO contests_fts (rowid, title, organizer, qualifications, description) VALUES (?, ?, ?, ?, ?)",
+                [_fts_row(rowid, *fts_fields[cid]) for cid, rowid in rowids],
+            )
+
+def _fts_query(q: str) -> Tuple[Union[str, None], List[str]]:
+    """
+    Split ``q`` into an FTS5 MATCH expression (terms of 3+ characters, ANDed as
+    quoted phrases) and the shorter terms, which trigrams can't match and are
+    filtered with LIKE instead.
+    """
+    terms = q.split()
+    phrases = ['"' + t.replace('"', '""') + '"' for t in terms if len(t) >= 3]
+    short = [t for t in terms if len(t) < 3]
+    return (" ".join(phrases) or None), short
+
+def search_contests(
+    q: str = "",
+    category: Union[str, None] = None,
+    max_fee: Union[int, None] = None,
+    deadline_after: Union[date, None] = None,
+    deadline_before: Union[date, None] = None,
+    limit: int = 20,
+) -> List[Contest]:
+    match, short = _fts_query(q or "")
+    where, params = [], []
+    if match:
+        where.append("contests_fts MATCH ?")
+        params.append(match)
+    for t in short:
+        where.append("(c.title LIKE ? OR c.description LIKE ?)")
+        params.extend([f"%{t}%"] * 2)
+    if category:
+        where.append("(c.source = ? OR c.categories LIKE ?)")
+        params.extend([category, f"%|{category}|%"])
+    if max_fee is not None:
+        where.append("c.fee IS NOT NULL AND c.fee <= ?")
+        params.append(max_fee)
+    if deadline_after:
+        where.append("c.deadline >= ?")
+        params.append(deadline_after.isoformat())
+    if deadline_before:
+        where.append("c.deadline <= ?")
+        params.append(deadline_before.isoformat())
+
+    if match:
+        sql = "SELECT c.* FROM contests_fts JOIN contests c ON c.rowid = contests_fts.rowid"
+        order = "bm25(contests_fts)"
+    else:
+        sql = "SELECT c.* FROM contests c"
+        order = "c.deadline IS NULL, c.deadline, c.updated_at DESC"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order} LIMIT ?"
+    params.append(limit)
+
+    with _search_lock:
+        rows = _get_search_db().execute(sql, params).fetchall()
+    return [
+        Contest(
+            title=r["title"],
+            description=r["description"],
+            url=r["url"],
+            image=r["image"],
+            status=r["status"],
+            contest_details=json.loads(r["details"]) if r["details"] else None,
+        )
+        for r in rows
+    ]
+
+
+# ============================
+# EXPORT
+# ============================
+
+EXPORT_CHUNK_SIZE = int(os.environ.get("CAMPHUB_EXPORT_CHUNK_SIZE", "500"))
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+EXPORT_COLUMNS = (
+    "id", "url", "title", "status", "source", "categories", "organizer", "event_format",
+    "event_date", "application_deadline", "deadline", "fee_text", "fee",
+    "max_participants", "participants", "qualifications", "description", "updated_at",
+)
+
+_PARTICIPANTS_RE = re.compile(r"(\d[\d,]*)\s*(?:คน|ที่นั่ง)")
+
+def parse_participants(text: str) -> Union[int, None]:
+    """
+    Head count from text like ``ม.4-6 จำนวน 40 คน``. Only numbers followed by คน / ที่นั่ง
+    count (grade levels don't); None when there is no such number or several disagree.
+    """
+    text = " ".join((text or "").split())
+    if _NUMBER_RE.fullmatch(text):
+        return int(text.replace(",", ""))
+    counts = {int(n.replace(",", "")) for n in _PARTICIPANTS_RE.findall(text)}
+    return counts.pop() if len(counts) == 1 else None
+
+def _export_row(r: sqlite3.Row) -> dict:
+    details = json.loads(r["details"]) if r["details"] else {}
+    return {
+        "id": r["id"],
+        "url": r["url"],
+        "title": r["title"],
+        "status": r["status"],
+        "source": r["source"],
+        "categories": details.get("categories") or [],
+        "organizer": details.get("organizer", ""),
+        "event_format": details.get("event_format", ""),
+        "event_date": details.get("event_date", ""),
+        "application_deadline": details.get("application_deadline", ""),
+        "deadline": date.fromisoformat(r["deadline"]) if r["deadline"] else None,
+        "fee_text": details.get("fee", ""),
+        "fee": r["fee"],
+        "max_participants": details.get("max_participants", ""),
+        "participants": parse_participants(details.get("max_participants", "")),
+        "qualifications": details.get("qualifications", ""),
+        "description": r["description"],
+        "updated_at": r["updated_at"],
+    }
+
+def iter_export_chunks(since: Union[str, None] = None, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Yield stored contests as lists of typed rows, ``chunk_size`` at a time. Each chunk is a
+    separate keyset query, so the index lock is never held while the consumer writes.
+    """
+    last_rowid = 0
     while True:
-        url = url_generator(page)
-        print(f"[Scraping] {url}")
-        r = requests.get(url, headers=HEADERS)
-        if r.status_code != 200:
-            break
+        sql = "SELECT rowid, * FROM contests WHERE rowid > ?"
+        params = [last_rowid]
+        if since:
+            sql += " AND updated_at >= ?"
+            params.append(since)
+        sql += " ORDER BY rowid LIMIT ?"
+        params.append(chunk_size)
+        with _search_lock:
+            rows = _get_search_db().execute(sql, params).fetchall()
+        if not rows:
+            return
+        last_rowid = rows[-1]["rowid"]
+        yield [_export_row(r) for r in rows]
+
+def export_ndjson(chunks) -> Iterator[bytes]:
+    for chunk in chunks:
+        lines = [json.dumps(row, ensure_ascii=False, default=str) for row in chunk]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+def export_csv(chunks) -> Iterator[bytes]:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for chunk in chunks:
+        for row in chunk:
+            writer.writerow({**row, "categories": "|".join(row["categories"])})
+        yield out.getvalue().encode("utf-8")
+        out.seek(0)
+        out.truncate()
+    if out.tell():
+        yield out.getvalue().encode("utf-8")
+
+
+class _ByteSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to a generator as they arrive."""
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._parts.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def export_parquet(chunks) -> Iterator[bytes]:
+    """One row group per chunk, streamed out as each group is written."""
+    if pa is None:
+        raise RuntimeError("Parquet export needs the pyarrow package")
+    schema = pa.schema([
+        ("id", pa.string()), ("url", pa.string()), ("title", pa.string()), ("status", pa.string()),
+        ("source", pa.string()), ("categories", pa.list_(pa.string())), ("organizer", pa.string()),
+        ("event_format", pa.string()), ("event_date", pa.string()), ("application_deadline", pa.string()),
+        ("deadline", pa.date32()), ("fee_text", pa.string()), ("fee", pa.int64()),
+        ("max_participants", pa.string()), ("participants", pa.int64()), ("qualifications", pa.string()),
+        ("description", pa.string()), ("updated_at", pa.string()),
+    ])
+    sink = _ByteSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+EXPORTERS = {"ndjson": export_ndjson, "csv": export_csv, "parquet": export_parquet}
+
+
+# ============================
+# MEDIA
+# ============================
+# Optional: posters are downloaded once, deduplicated by content hash and kept as
+# resized thumbnails under MEDIA_DIR, served from /media/{hash}.
 
-        soup = BeautifulSoup(r.text, "html.parser")
-        articles = soup.find_all("article", class_="vce-post")
-        if not articles:
+MEDIA_DIR = Path(os.environ.get("CAMPHUB_MEDIA_DIR", "media"))
+MEDIA_MAX_BYTES = int(os.environ.get("CAMPHUB_MEDIA_MAX_MB", "512")) * 1024 * 1024
+MEDIA_THUMB_SIZE = int(os.environ.get("CAMPHUB_MEDIA_THUMB_SIZE", "640"))
+MEDIA_CONCURRENCY = int(os.environ.get("CAMPHUB_MEDIA_CONCURRENCY", "8"))
+# Absolute base URL of this API, used to point Discord embeds at /media instead of camphub
+MEDIA_PUBLIC_URL = os.environ.get("CAMPHUB_PUBLIC_URL", "").rstrip("/")
+MEDIA_FIELDS = ("image", "poster_image")
+
+_media_lock = threading.Lock()
+# Running size of MEDIA_DIR, counted once on the first store; None until then
+_media_bytes = None
+_MEDIA_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+def _media_path(digest: str) -> Union[Path, None]:
+    for path in MEDIA_DIR.glob(f"{digest}.*"):
+        return path
+    return None
+
+def _make_thumbnail(content: bytes, content_type: str) -> Tuple[bytes, str]:
+    """Shrink to MEDIA_THUMB_SIZE on the long edge; without Pillow the original is kept."""
+    if Image is None:
+        return content, mimetypes.guess_extension(content_type.split(";")[0].strip()) or ".img"
+    with Image.open(io.BytesIO(content)) as img:
+        img.thumbnail((MEDIA_THUMB_SIZE, MEDIA_THUMB_SIZE))
+        out = io.BytesIO()
+        img.convert("RGB").save(out, "JPEG", quality=82, optimize=True)
+    return out.getvalue(), ".jpg"
+
+def _media_files() -> List[Tuple[float, int, Path]]:
+    files = []
+    for path in MEDIA_DIR.iterdir():
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        if path.is_file():
+            files.append((st.st_mtime, st.st_size, path))
+    return files
+
+def _evict_media(added: int) -> List[str]:
+    """
+    Count ``added`` bytes against MEDIA_MAX_BYTES. Once over, drop least recently served
+    files down to 90% of it and return their hashes. Called with _media_lock held.
+    """
+    global _media_bytes
+    if _media_bytes is None:
+        _media_bytes = sum(size for _, size, _ in _media_files())
+    else:
+        _media_bytes += added
+    if _media_bytes <= MEDIA_MAX_BYTES:
+        return []
+    # Rescan only when over budget: other workers share the directory, so the running
+    # total is just a trigger and the real sizes decide what goes.
+    files = _media_files()
+    total = sum(size for _, size, _ in files)
+    evicted = []
+    for _, size, path in sorted(files):
+        if total <= MEDIA_MAX_BYTES * 0.9:
             break
+        path.unlink(missing_ok=True)
+        total -= size
+        evicted.append(path.stem)
+    _media_bytes = total
+    return evicted
 
-        for a in articles:
-            title_tag = a.find("h2", class_="entry-title").find("a")
-            desc = a.find("div", class_="entry-content").text.strip().replace("\n", " ")
-            img = a.find("img")
-            image = img["data-src"] if img and img.has_attr("data-src") else ""
-            status = a.find("span", class_="closedate")
-            status_text = status.text.strip() if status else "เปิดรับสมัคร"
-
-            if stop_on_closed and status_text == "ปิดรับสมัครแล้ว":
-                return contests
-
-            contest = Contest(
-                title=title_tag.text.strip(),
-                description=desc,
-                url=title_tag["href"],
-                image=image,
-                status=status_text,
-                contest_details=fetch_contest_details(title_tag["href"])
-            )
-            contests.append(contest)
+def store_media(url: str) -> Union[str, None]:
+    """Download ``url`` and store its thumbnail; returns the content hash, or None on failure."""
+    with _search_lock:
+        row = _get_search_db().execute("SELECT hash FROM media WHERE url = ?", (url,)).fetchone()
+    if row is not None and _media_path(row["hash"]) is not None:
+        return row["hash"]
+
+    with trace_span("media", url=url) as sp:
+        try:
+            res = http.get(url, headers=HEADERS, timeout=30)
+        except Exception as e:
+            print(f"[Media] {url}: {e}")
+            return None
+        sp["status"] = res.status_code
+        sp["bytes"] = len(res.content)
+        if res.status_code != 200 or not res.content:
+            return None
+
+        digest = hashlib.sha256(res.content).hexdigest()
+        evicted = []
+        if _media_path(digest) is None:
+            try:
+                thumb, ext = _make_thumbnail(res.content, res.headers.get("content-type", ""))
+            except Exception as e:
+                print(f"[Media] {url}: {e}")
+                return None
+            MEDIA_DIR.mkdir(parents=True, exist_ok=True)
+            with _media_lock:
+                (MEDIA_DIR / f"{digest}{ext}").write_bytes(thumb)
+                evicted = _evict_media(len(thumb))
+            if evicted:
+                sp["evicted"] = len(evicted)
+
+    with _search_lock:
+        db = _get_search_db()
+        with db:
+            if evicted:
+                db.executemany("DELETE FROM media WHERE hash = ?", [(h,) for h in evicted])
+            # A thumbnail bigger than the whole budget is evicted right away
+            if digest in evicted:
+                return None
+            db.execute("INSERT OR REPLACE INTO media (url, hash) VALUES (?, ?)", (url, digest))
+    return digest
+
+def attach_media(contests: List[Contest]):
+    """Fill ``contest.media`` with /media paths for each contest's image and poster."""
+    urls = set()
+    for c in contests:
+        for field in MEDIA_FIELDS:
+            url = _media_source(c, field)
+            if url:
+                urls.add(url)
 
-        page += 1
-    return contests
+    with ThreadPoolExecutor(max_workers=MEDIA_CONCURRENCY, thread_name_prefix="media") as executor:
+        futures = {url: submit_traced(executor, store_media, url) for url in urls}
+        hashes = {url: f.result() for url, f in futures.items()}
+
+    for c in contests:
+        media = {}
+        for field in MEDIA_FIELDS:
+            digest = hashes.get(_media_source(c, field))
+            if digest:
+                media[field] = f"/media/{digest}"
+        c.media = media or None
+
+def _media_source(contest: Contest, field: str) -> str:
+    if field == "image":
+        return contest.image
+    return (contest.contest_details or {}).get(field, "")
+
+def thumbnail_url(contest: Contest) -> str:
+    """Image URL for embeds: our cached copy when a public URL is configured, else camphub's."""
+    if MEDIA_PUBLIC_URL and contest.media and contest.media.get("image"):
+        return MEDIA_PUBLIC_URL + contest.media["image"]
+    return contest.image
+
+
+# ============================
+# SCHEDULER
+# ============================
+# Runs notify jobs in-process instead of waiting for an external scheduler to call
+# /cron/notify. CAMPHUB_SCHEDULE points at a JSON file such as:
+#   {
+#     "max_concurrent": 2,
+#     "jobs": [
+#       {"name": "contest", "category": "contest", "webhook": "https://discord.com/api/webhooks/...",
+#        "interval": 900, "jitter": 60},
+#       {"name": "kku", "type": "tag", "category": "khon-kaen-university", "webhook": "...", "interval": 3600}
+#     ]
+#   }
+# Intervals and jitter are in seconds.
+
+SCHEDULE_FILE = os.environ.get("CAMPHUB_SCHEDULE", "")
+# Every worker starts a scheduler, but only the holder of this lease dispatches jobs.
+# It is renewed every third of its TTL; if the leader dies another worker takes over.
+SCHEDULER_LEADER_LEASE = "scheduler:leader"
+SCHEDULER_LEADER_TTL = int(os.environ.get("CAMPHUB_SCHEDULER_LEADER_TTL", "30"))
+
+
+class ScheduledJob:
+    def __init__(
+        self,
+        name: str,
+        category: str,
+        webhook: str,
+        type: str = "default",
+        interval: float = 900,
+        jitter: float = 60,
+        notify_updates: bool = True,
+    ):
+        self.name = name
+        self.category = category
+        self.webhook = webhook
+        self.type = type
+        self.interval = interval
+        self.jitter = jitter
+        self.notify_updates = notify_updates
+        self.next_run = 0.0
+        self.running = False
+
+    def describe(self) -> dict:
+        # The webhook URL is a credential; keep it out of status output.
+        return {
+            "name": self.name,
+            "type": self.type,
+            "category": self.category,
+            "interval": self.interval,
+            "jitter": self.jitter,
+            "running": self.running,
+            "next_run": datetime.fromtimestamp(self.next_run).isoformat() if self.next_run else None,
+        }
+
+
+class Scheduler:
+    """
+    Dispatches jobs on their intervals from one timer thread onto a pool of
+    ``max_concurrent`` workers. A job that is still running when it comes due again
+    is skipped rather than stacked. Across workers, only the leader-lease holder runs jobs;
+    run history goes to the shared backend so any worker can report it.
+    """
+
+    def __init__(self, jobs: List[ScheduledJob], max_concurrent: int = 1, history: int = 200):
+        self.jobs = jobs
+        self.max_concurrent = max_concurrent
+        self.history = history
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._executor = None
+        self._thread = None
+        self._leader_token = None
+
+    def _stagger(self, now: float):
+        # Spread first runs across each job's interval so jobs don't all hit camphub at once.
+        for i, job in enumerate(self.jobs):
+            job.next_run = now + job.interval * i / len(self.jobs) + random.uniform(0, job.jitter)
+
+    def _hold_leadership(self) -> bool:
+        backend = get_backend()
+        if self._leader_token is not None:
+            if backend.renew_lease(SCHEDULER_LEADER_LEASE, self._leader_token, SCHEDULER_LEADER_TTL):
+                return True
+            print("[Scheduler] lost leadership")
+            self._leader_token = None
+        self._leader_token = backend.acquire_lease(SCHEDULER_LEADER_LEASE, SCHEDULER_LEADER_TTL)
+        if self._leader_token is None:
+            return False
+        print("[Scheduler] became leader")
+        self._stagger(time.time())
+        return True
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader_token is not None
+
+    def start(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="scheduler")
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._leader_token is not None:
+            get_backend().release_lease(SCHEDULER_LEADER_LEASE, self._leader_token)
+            self._leader_token = None
+
+    def _loop(self):
+        renew_every = SCHEDULER_LEADER_TTL / 3
+        while not self._stop.is_set():
+            try:
+                leader = self._hold_leadership()
+            except Exception as e:
+                print(f"[Scheduler] leader lease failed: {e}")
+                self._leader_token = None
+                leader = False
+            if not leader:
+                self._stop.wait(renew_every)
+                continue
+
+            now = time.time()
+            for job in self.jobs:
+                if job.next_run > now:
+                    continue
+                job.next_run = now + max(job.interval + random.uniform(-job.jitter, job.jitter), 1)
+                with self._lock:
+                    busy = job.running
+                    job.running = True
+                if busy:
+                    self._record(job, now, 0.0, "skipped", error="previous run still in progress")
+                    continue
+                self._executor.submit(self._run, job)
+            self._stop.wait(min(max(min(j.next_run for j in self.jobs) - time.time(), 0.5), renew_every))
+
+    def _run(self, job: ScheduledJob):
+        started = time.time()
+        t0 = time.perf_counter()
+        result, error = {}, None
+        try:
+            source = get_source(job.type)
+            with crawl_lease(f"notify:{source.name}:{job.category}") as held:
+                if held:
+                    result = run_notify(source, job.category, job.webhook, job.notify_updates)
+                else:
+                    result = {"status": "skipped"}
+                    error = "another worker is running this category"
+        except Exception as e:
+            result, error = {"status": "error"}, str(e)
+        finally:
+            duration = time.perf_counter() - t0
+            with self._lock:
+                job.running = False
+            self._record(job, started, duration, result.get("status", "error"), result, error)
+            print(f"[Scheduler] {job.name} {result.get('status')} in {duration:.1f}s" + (f": {error}" if error else ""))
+
+    def _record(self, job: ScheduledJob, started: float, duration: float, status: str, result: Union[dict, None] = None, error: Union[str, None] = None):
+        result = result or {}
+        run = {
+            "job": job.name,
+            "started_at": datetime.fromtimestamp(started).isoformat(),
+            "duration_s": round(duration, 3),
+            "status": status,
+            "new_count": result.get("new_count"),
+            "updated_count": result.get("updated_count"),
+            "error": error,
+        }
+        try:
+            get_backend().append_run(run, self.history)
+        except Exception as e:
+            print(f"[Scheduler] could not record run of {job.name}: {e}")
+
+    def status(self) -> dict:
+        with self._lock:
+            jobs = [job.describe() for job in self.jobs]
+        return {
+            "leader": self.is_leader,
+            "max_concurrent": self.max_concurrent,
+            "jobs": jobs,
+            "runs": get_backend().recent_runs(self.history),
+        }
+
+
+def load_schedule(path: str) -> Scheduler:
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    jobs = [
+        ScheduledJob(
+            name=j.get("name") or f"{j.get('type', 'default')}:{j['category']}",
+            category=j["category"],
+            webhook=j["webhook"],
+            type=j.get("type", "default"),
+            interval=float(j.get("interval", 900)),
+            jitter=float(j.get("jitter", 60)),
+            notify_updates=j.get("notify_updates", True),
+        )
+        for j in config.get("jobs", [])
+    ]
+    return Scheduler(jobs, max_concurrent=int(config.get("max_concurrent", 1)))
+
+
+scheduler = None
+
+
+# ============================
+# STARTUP
+# ============================
+
+# Listings to crawl before the worker accepts traffic, e.g. "default:contest,type:tutor"
+WARM_LISTINGS = os.environ.get("CAMPHUB_WARM", "")
+
+def parse_listings(spec: str) -> List[Tuple[str, str]]:
+    """Parse ``type:category`` pairs; a bare ``category`` means the default listing."""
+    listings = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        type, _, category = item.rpartition(":")
+        listings.append((type or "default", category))
+    return listings
+
+@app.on_event("startup")
+def warm_up():
+    # Compile the soupsieve selectors used by the detail parser, open the search index and
+    # a keep-alive connection to camphub so the first real request doesn't pay for it.
+    _parse_contest_details("<html></html>")
+    try:
+        http.head(BASE_URL, headers=HEADERS, timeout=10)
+    except requests.RequestException as e:
+        print(f"[Warm] could not reach {BASE_URL}: {e}")
+    try:
+        _get_search_db()
+    except sqlite3.Error as e:
+        # e.g. SQLite older than 3.34 has no trigram tokenizer; /search fails but the rest still serves.
+        print(f"[Warm] search index unavailable: {e}")
+    get_backend()
+
+    listings = parse_listings(WARM_LISTINGS)
+    if not listings:
+        return
+    for type, category in listings:
+        source = get_source(type)
+        start = time.perf_counter()
+        try:
+            # Other workers warming the same listing wait here and then hit the shared cache.
+            with crawl_lease(f"crawl:{source.name}:{category}", wait=CRAWL_LEASE_WAIT):
+                contests = scrape_contests(source, category)
+            _index_quietly(contests, category)
+            print(f"[Warm] {type}:{category} {len(contests)} contests in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            print(f"[Warm] {type}:{category} failed: {e}")
+
+
+@app.on_event("startup")
+def start_scheduler():
+    global scheduler
+    if not SCHEDULE_FILE:
+        return
+    scheduler = load_schedule(SCHEDULE_FILE)
+    if scheduler.jobs:
+        scheduler.start()
+        print(f"[Scheduler] {len(scheduler.jobs)} jobs, at most {scheduler.max_concurrent} at a time")
+
+@app.on_event("shutdown")
+def stop_scheduler():
+    if scheduler is not None:
+        scheduler.stop()
 
 
 # ============================
@@ -192,41 +1884,157 @@ def scrape_contests(url_generator: callable, stop_on_closed=True) -> List[Contes
 # ============================
 
 @app.get("/contests")
-def get_contests(category: str = Query("contest"), type: str = Query("default")):
+def get_contests(
+    category: str = Query("contest"),
+    type: str = Query("default"),
+    trace: bool = Query(False, description="Return a per-request span tree"),
+    profile: Union[str, None] = Query(None, description="cprofile | pyinstrument"),
+    x_camphub_trace: bool = Header(False),
+    fields: Union[str, None] = Query(None, description="Comma-separated projection, e.g. title,url,contest_details.application_deadline"),
+    limit: Union[int, None] = Query(None, ge=1, description="Stop crawling once this many contests are collected"),
+    cursor: Union[str, None] = Query(None, description="next_cursor from a previous response"),
+    media: bool = Query(False, description="Cache posters locally and add /media links"),
+):
     try:
-        def make_url(page):
-            base = f"https://www.camphub.in.th/"
-            if type == "type":
-                return f"{base}type/{category}/" + (f"page/{page}/" if page > 1 else "")
-            elif type == "tag":
-                return f"{base}tag/{category}/" + (f"page/{page}/" if page > 1 else "")
-            elif type == "medical":
-                return f"{base}medical-health/{category}/" + (f"page/{page}/" if page > 1 else "")
-            elif type == "private":
-                return f"{base}private-university/" + (f"page/{page}/" if page > 1 else "")
-            else:
-                return f"{base}{category}/" + (f"page/{page}/" if page > 1 else "")
-
-        contests = scrape_contests(make_url)
-        return {
+        selected = parse_fields(fields)
+        scope = f"{type}:{category}"
+        start_page, start_offset = decode_cursor(cursor, scope) if cursor else (1, 0)
+
+        source = get_source(type)
+
+        # Only full crawls are serialized: while another worker crawls this listing, wait for it
+        # and then read its pages from the shared cache. A limit/cursor page fetches a few
+        # pages at most and shouldn't queue behind a full crawl.
+        if limit is None:
+            lease = crawl_lease(f"crawl:{source.name}:{category}", wait=CRAWL_LEASE_WAIT if source.cache_ttl > 0 else 0)
+        else:
+            lease = nullcontext()
+
+        with request_trace("GET /contests", enabled=trace or x_camphub_trace, profile=profile) as report, lease:
+            contests = []
+            next_cursor = None
+            crawl = iter_contests(
+                source,
+                category,
+                with_details=wants_details(selected),
+                start_page=start_page,
+                start_offset=start_offset,
+                limit=limit,
+            )
+            for contest, page, offset in crawl:
+                contests.append(contest)
+                if limit is not None and len(contests) >= limit:
+                    next_cursor = encode_cursor(scope, page, offset + 1)
+                    break
+            crawl.close()
+            if wants_details(selected):
+                _index_quietly(contests, category)
+            if media:
+                attach_media(contests)
+        return ORJSONResponse({
             "status": "success",
             "category": category,
             "type": type,
             "total": len(contests),
+            "next_cursor": next_cursor,
             "datetime": datetime.now().isoformat(),
-            "data": contests
-        }
+            "data": [project_contest(c, selected) for c in contests],
+            **report
+        })
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
+def _index_quietly(contests: List[Contest], source: str):
+    # The index is a side product of scraping; a broken index must not fail the scrape.
+    try:
+        with trace_span("index", contests=len(contests)):
+            index_contests(contests, source)
+    except Exception as e:
+        print(f"[Index] failed: {e}")
+
+
+@app.get("/search")
+def search(
+    q: str = Query("", description="คำค้น เช่น ชื่อค่าย ผู้จัด คุณสมบัติ"),
+    category: Union[str, None] = Query(None),
+    free: bool = Query(False, description="เฉพาะค่ายฟรี"),
+    max_fee: Union[int, None] = Query(None),
+    deadline_after: Union[date, None] = Query(None),
+    deadline_before: Union[date, None] = Query(None),
+    limit: int = Query(20, ge=1, le=200),
+    fields: Union[str, None] = Query(None),
+):
+    try:
+        selected = parse_fields(fields)
+        start = time.perf_counter()
+        results = search_contests(
+            q=q,
+            category=category,
+            max_fee=0 if free else max_fee,
+            deadline_after=deadline_after,
+            deadline_before=deadline_before,
+            limit=limit,
+        )
+        return ORJSONResponse({
+            "status": "success",
+            "query": q,
+            "total": len(results),
+            "took_ms": round((time.perf_counter() - start) * 1000, 3),
+            "data": [project_contest(c, selected) for c in results]
+        })
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+@app.get("/export")
+def export(
+    format: str = Query("ndjson", description="ndjson | csv | parquet"),
+    since: Union[str, None] = Query(None, description="Only records updated at or after this ISO timestamp"),
+):
+    if format not in EXPORTERS:
+        return {"status": "error", "message": f"Unknown format: {format}"}
+    if format == "parquet" and pa is None:
+        return {"status": "error", "message": "Parquet export needs the pyarrow package"}
+    filename = f"camphub-{datetime.now():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        EXPORTERS[format](iter_export_chunks(since)),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.get("/media/{digest}")
+def get_media(digest: str):
+    path = _media_path(digest) if _MEDIA_HASH_RE.match(digest) else None
+    if path is None:
+        return Response(status_code=404)
+    # Mark as recently used for eviction
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        # Evicted between lookup and now
+        return Response(status_code=404)
+    return FileResponse(
+        path,
+        media_type=mimetypes.guess_type(path.name)[0] or "application/octet-stream",
+        headers={"Cache-Control": "public, max-age=31536000, immutable", "ETag": f'"{digest}"'},
+    )
+
+
 @app.get("/contest/details")
-def get_details(url: str = Query(...)):
+def get_details(
+    url: str = Query(...),
+    trace: bool = Query(False),
+    profile: Union[str, None] = Query(None),
+    x_camphub_trace: bool = Header(False),
+):
     if not is_valid_camphub_url(url):
         return {"status": "error", "message": "Invalid Camphub URL"}
     try:
-        data = fetch_contest_details(url)
-        return {"status": "success", "url": url, "data": data}
+        with request_trace("GET /contest/details", enabled=trace or x_camphub_trace, profile=profile) as report:
+            data = fetch_contest_details(url)
+        return {"status": "success", "url": url, "data": data, **report}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -236,54 +2044,126 @@ def helloworld():
 
 
 @app.get("/cron/notify")
-def cron_notify(category: str = Query("contest"), webhook: str = Query(...)):
+def cron_notify(
+    category: str = Query("contest"),
+    type: str = Query("default"),
+    webhook: str = Query(...),
+    notify_updates: bool = Query(True, description="Also notify when a tracked contest's details change"),
+):
     try:
-        seen = load_seen_contests()
-        new_seen = seen.copy()
-
-        def make_url(page):
-            base = f"https://www.camphub.in.th/"
-            if type == "type":
-                return f"{base}type/{category}/" + (f"page/{page}/" if page > 1 else "")
-            elif type == "tag":
-                return f"{base}tag/{category}/" + (f"page/{page}/" if page > 1 else "")
-            elif type == "medical":
-                return f"{base}medical-health/{category}/" + (f"page/{page}/" if page > 1 else "")
-            elif type == "private":
-                return f"{base}private-university/" + (f"page/{page}/" if page > 1 else "")
-            else:
-                return f"{base}{category}/" + (f"page/{page}/" if page > 1 else "")
-        
-        contests = scrape_contests(make_url)
+        source = get_source(type)
+        with crawl_lease(f"notify:{source.name}:{category}") as held:
+            if not held:
+                return {
+                    "status": "skipped",
+                    "message": "Another worker is already running notify for this category",
+                    "datetime": datetime.now().isoformat()
+                }
+            return run_notify(source, category, webhook, notify_updates)
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
-        new_contests = []
-        for c in contests:
-            cid = hash_contest(c)
-            if cid not in seen:
-                new_seen.add(cid)
-                new_contests.append(c)
 
-        status_send = []
-        for c in new_contests:
-            if send_discord_notification(c, webhook):
-                status_send.append({"title": c.title, "status": "sent"})
-            else:
-                status_send.append({"title": c.title, "status": "failed"})
+@app.get("/cron/runs")
+def cron_runs():
+    if scheduler is None:
+        return {"status": "error", "message": "Scheduler is not configured (set CAMPHUB_SCHEDULE)"}
+    return {"status": "success", **scheduler.status()}
 
-        if new_contests:
-            save_seen_contests(new_seen)
 
-        return {
-            "status": "success",
-            "messsage": "Notifications sent",
-            "new_count": len(new_contests),
-            "datetime": datetime.now().isoformat(),
-            "notifications": status_send
-        }
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
-    
+def run_notify(source: ListingSource, category: str, webhook: str, notify_updates: bool = True) -> dict:
+    """Crawl one listing, notify about new and changed contests, and persist the seen state."""
+    seen = load_seen_contests()
+    contests = scrape_contests(source, category, seen=seen)
+    _index_quietly(contests, category)
+
+    new_contests = []
+    updated_contests = []
+    changed = {}
+    for c in contests:
+        cid = hash_contest(c)
+        entry = make_seen_entry(c)
+        if cid not in seen:
+            new_contests.append(c)
+        elif seen[cid].get("fingerprint") and seen[cid]["fingerprint"] != entry["fingerprint"]:
+            diff = diff_contest(seen[cid], c)
+            if diff:
+                updated_contests.append((c, diff))
+        if seen.get(cid) != entry:
+            changed[cid] = entry
+
+    if MEDIA_PUBLIC_URL and (new_contests or updated_contests):
+        attach_media(new_contests + [c for c, _ in updated_contests])
+
+    status_send = []
+    for c in new_contests:
+        if send_discord_notification(c, webhook):
+            status_send.append({"title": c.title, "status": "sent"})
+        else:
+            status_send.append({"title": c.title, "status": "failed"})
+
+    updates = []
+    for c, diff in updated_contests:
+        sent = notify_updates and send_discord_update_notification(c, diff, webhook)
+        updates.append({
+            "title": c.title,
+            "url": c.url,
+            "status": "sent" if sent else ("failed" if notify_updates else "skipped"),
+            "diff": {k: {"old": old, "new": new} for k, (old, new) in diff.items()}
+        })
+
+    if changed:
+        save_seen_contests(changed)
+
+    return {
+        "status": "success",
+        "messsage": "Notifications sent",
+        "new_count": len(new_contests),
+        "updated_count": len(updated_contests),
+        "updates": updates,
+        "datetime": datetime.now().isoformat(),
+        "notifications": status_send
+    }
+
 # === Run the app with Uvicorn ===
+DEFAULT_PROD_BACKEND_URL = "sqlite:///state.db"
+
+def serve_production(host: str, port: int, workers: int):
+    if workers > 1 and not os.environ.get("CAMPHUB_BACKEND_URL"):
+        # LocalBackend keeps leases per process and rewrites seen_contests.json unlocked,
+        # so workers sharing it would double-notify and lose seen entries.
+        os.environ["CAMPHUB_BACKEND_URL"] = DEFAULT_PROD_BACKEND_URL
+        print(f"[Serve] {workers} workers: sharing state through {DEFAULT_PROD_BACKEND_URL}")
+    uvicorn.run("main:app", host=host, port=port, workers=workers, reload=False, access_log=False)
+
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="127.0.0.1", port=1372, reload=True)
+    parser = argparse.ArgumentParser(description="Camphub Scraper API")
+    parser.add_argument("--prod", action="store_true", help="multi-worker server without reload")
+    parser.add_argument("--host", default=os.environ.get("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "1372")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("CAMPHUB_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--warm", default=None, help='listings to crawl at startup, e.g. "default:contest,type:tutor"')
+    parser.add_argument("--export", choices=sorted(EXPORTERS), help="write the stored contests and exit")
+    parser.add_argument("--out", default="-", help="export destination file (default: stdout)")
+    parser.add_argument("--since", default=None, help="export only records updated at or after this ISO timestamp")
+    args = parser.parse_args()
+
+    if args.export:
+        out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+        try:
+            for part in EXPORTERS[args.export](iter_export_chunks(args.since)):
+                out.write(part)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        sys.exit(0)
+
+    if args.warm is not None:
+        # Workers are separate processes; they pick this up when they import main.
+        os.environ["CAMPHUB_WARM"] = args.warm
+
+    if args.prod:
+        serve_production(args.host, args.port, args.workers)
+    else:
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True)
 
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# main.py lives at the repo root and is not an installed package.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,118 @@
+import json
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze time.time() (which fakeredis also reads) and let the test move it forward."""
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+
+    def advance(seconds):
+        now[0] += seconds
+
+    return advance
+
+
+@pytest.fixture
+def seen_file(tmp_path, monkeypatch):
+    path = tmp_path / "seen_contests.json"
+    monkeypatch.setattr(main, "SEEN_CONTESTS_FILE", path)
+    return path
+
+
+@pytest.fixture(params=["local", "sqlite", "redis"])
+def backend(request, tmp_path, seen_file, monkeypatch):
+    if request.param == "local":
+        return main.LocalBackend()
+    if request.param == "sqlite":
+        return main.SQLiteBackend(str(tmp_path / "state.db"))
+    fakeredis = pytest.importorskip("fakeredis")
+    if main.redis is None:
+        pytest.skip("redis package not installed")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(main.redis.Redis, "from_url", lambda url: fakeredis.FakeRedis(server=server))
+    return main.RedisBackend("redis://localhost:6379/0")
+
+
+def test_lease_is_exclusive_until_released(backend, clock):
+    token = backend.acquire_lease("crawl:x", ttl=30)
+    assert token is not None
+    assert backend.acquire_lease("crawl:x", ttl=30) is None
+
+    backend.release_lease("crawl:x", "not-the-token")
+    assert backend.acquire_lease("crawl:x", ttl=30) is None
+
+    backend.release_lease("crawl:x", token)
+    assert backend.acquire_lease("crawl:x", ttl=30) is not None
+
+
+def test_lease_renew_extends_expiry(backend, clock):
+    token = backend.acquire_lease("crawl:x", ttl=30)
+    clock(20)
+    assert backend.renew_lease("crawl:x", token, ttl=30)
+    assert not backend.renew_lease("crawl:x", "not-the-token", ttl=30)
+    clock(20)
+    assert backend.acquire_lease("crawl:x", ttl=30) is None
+
+
+def test_lease_expires(backend, clock):
+    token = backend.acquire_lease("crawl:x", ttl=30)
+    clock(31)
+    assert not backend.renew_lease("crawl:x", token, ttl=30)
+    other = backend.acquire_lease("crawl:x", ttl=30)
+    assert other is not None
+
+    # The old holder releasing late must not drop the new holder's lease.
+    backend.release_lease("crawl:x", token)
+    assert backend.acquire_lease("crawl:x", ttl=30) is None
+
+
+def test_update_seen_merges(backend):
+    backend.update_seen({"a": {"snippet": "1"}, "b": {"snippet": "2"}})
+    backend.update_seen({"b": {"snippet": "3"}, "c": {"snippet": "4"}})
+    backend.update_seen({})
+    assert backend.load_seen() == {
+        "a": {"snippet": "1"},
+        "b": {"snippet": "3"},
+        "c": {"snippet": "4"},
+    }
+
+
+def test_page_expires_after_ttl(backend, clock):
+    backend.set_page("https://example.com/", main.Page(200, "<html>ไทย</html>", 17, {"ETag": '"v1"'}), ttl=60)
+    page = backend.get_page("https://example.com/")
+    assert page.from_cache
+    assert (page.status_code, page.text, page.size, page.headers) == (200, "<html>ไทย</html>", 17, {"ETag": '"v1"'})
+
+    clock(61)
+    assert backend.get_page("https://example.com/") is None
+
+
+def test_run_history_is_capped_newest_first(backend):
+    for i in range(5):
+        backend.append_run({"job": "contest", "n": i}, keep=3)
+    assert [r["n"] for r in backend.recent_runs(10)] == [4, 3, 2]
+    assert [r["n"] for r in backend.recent_runs(2)] == [4, 3]
+
+
+def test_local_backend_reads_legacy_seen_list(seen_file):
+    seen_file.write_text(json.dumps(["a", "b"]), encoding="utf-8")
+    backend = main.LocalBackend()
+    assert backend.load_seen() == {"a": {}, "b": {}}
+
+    backend.update_seen({"c": {"snippet": "1"}})
+    assert json.loads(seen_file.read_text(encoding="utf-8")) == {"a": {}, "b": {}, "c": {"snippet": "1"}}
+
+
+def test_sqlite_backend_imports_seen_file_once(seen_file, tmp_path):
+    seen_file.write_text(json.dumps(["a", "b"]), encoding="utf-8")
+    db = str(tmp_path / "state.db")
+    assert main.SQLiteBackend(db).load_seen() == {"a": {}, "b": {}}
+
+    seen_file.write_text(json.dumps({"z": {"snippet": "9"}}), encoding="utf-8")
+    assert main.SQLiteBackend(db).load_seen() == {"a": {}, "b": {}}
@@ -0,0 +1,42 @@
+from datetime import date
+
+import pytest
+
+import main
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("ฟรี", 0),
+    ("ไม่มีค่าใช้จ่าย", 0),
+    ("1,500 บาท", 1500),
+    ("ค่าสมัคร 500 บาท (ฟรีอาหาร)", 500),
+    ("ฟรี ตลอด 3 วัน 2 คืน", 0),
+    ("ไม่มีค่าใช้จ่าย (รับ 40 คน)", 0),
+    ("300", 300),
+    ("ไม่ระบุ", None),
+    ("", None),
+])
+def test_parse_fee(text, expected):
+    assert main.parse_fee(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("30 ตุลาคม 2569", date(2026, 10, 30)),
+    ("30 ต.ค. 69", date(2026, 10, 30)),
+    ("ไม่ระบุ", None),
+])
+def test_parse_thai_date(text, expected):
+    assert main.parse_thai_date(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("50 คน", 50),
+    ("ม.4-6 จำนวน 40 คน", 40),
+    ("1,200 ที่นั่ง", 1200),
+    ("120", 120),
+    ("ชาย 20 คน หญิง 30 คน", None),
+    ("ม.4-6", None),
+    ("ไม่จำกัด", None),
+])
+def test_parse_participants(text, expected):
+    assert main.parse_participants(text) == expected